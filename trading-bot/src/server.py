@@ -8,22 +8,34 @@ Handles both entry and exit signals from Pine Script
 Saves all trade details to SQLite database
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sqlite3
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+import atexit
+import signal
+import sys
 import json
+import orjson
 import os
 from datetime import datetime
 from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import pandas as pd
+import numpy as np
 from tradelocker import TLAPI
 import base64
+import functools
 from typing import Optional, Tuple
 import threading
 import random
+import re
 
 
 def _mask(tok: Optional[str], head: int = 6, tail: int = 4) -> str:
@@ -38,14 +50,15 @@ def _b64url(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).decode().rstrip("=")
 
 
-def _jwt_expiry_info(token: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+@functools.lru_cache(maxsize=256)
+def _jwt_exp(token: Optional[str]) -> Optional[int]:
     """
-    Returns (exp_unix, seconds_left) from a JWT without verifying signature.
-    If token missing/invalid, returns (None, None).
+    Returns the `exp` claim of a JWT without verifying signature (cached per token string).
+    If token missing/invalid, returns None.
     """
     try:
         if not token or token.count(".") < 2:
-            return (None, None)
+            return None
         header_b64, payload_b64, _ = token.split(".", 2)
         # add padding for base64
         def _fixpad(s: str) -> bytes:
@@ -53,62 +66,151 @@ def _jwt_expiry_info(token: Optional[str]) -> Tuple[Optional[int], Optional[int]
         payload = json.loads(_fixpad(payload_b64))
         exp = payload.get("exp")
         if not isinstance(exp, int):
-            return (None, None)
-        now = int(time.time())
-        return (exp, exp - now)
+            return None
+        return exp
     except Exception:
+        return None
+
+
+def _jwt_expiry_info(token: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Returns (exp_unix, seconds_left) from a JWT without verifying signature.
+    If token missing/invalid, returns (None, None).
+    """
+    exp = _jwt_exp(token)
+    if exp is None:
         return (None, None)
+    return (exp, exp - int(time.time()))
 
 
-# ---- Per-account lightweight rate limit + 429 backoff ----
-_last_call_at = {}                 # key: (account_name, endpoint_key) -> last call epoch
-_last_call_lock = threading.Lock()
-MIN_GAP_SEC = 0.40                 # ~2.5 req/sec per endpoint/account; raise to 0.6–0.8 if needed
+# ---- Per-account token-bucket rate limit + 429 backoff ----
+RATE_LIMIT_PER_SEC = 2.5           # steady-state req/sec per endpoint/account; lower if 429s appear
+RATE_LIMIT_BURST = 3               # calls allowed back-to-back before pacing kicks in
+MIN_GAP_SEC = 1.0 / RATE_LIMIT_PER_SEC
+ACCOUNT_RATE_PER_SEC = 8.0         # account-wide pacing across all endpoints, kept under the TradeLocker quota
+ACCOUNT_RATE_BURST = 16
+ACCOUNT_RATE_MIN = 1.0             # floor for the account rate while backing off after 429s
 
 
-def _respect_rate_limit(account_name: str, endpoint_key: str, min_gap: float = MIN_GAP_SEC):
-    now = time.time()
-    with _last_call_lock:
-        last = _last_call_at.get((account_name, endpoint_key), 0.0)
-        wait = (last + min_gap) - now
+class TokenBucket:
+    """
+    Classic token bucket: refills at `rate` tokens/sec up to `cap`; each call takes one token.
+    With min_rate below rate it is adaptive: throttle() halves the rate after a 429 and
+    recover() creeps it back toward the configured rate on each success.
+    """
+    __slots__ = ('tokens', 'last', 'rate', 'cap', 'lock', 'base_rate', 'min_rate')
+
+    def __init__(self, rate: float, cap: float, min_rate: Optional[float] = None):
+        self.tokens = cap
+        self.last = time.monotonic()
+        self.rate = rate
+        self.cap = cap
+        self.lock = threading.Lock()
+        self.base_rate = rate
+        self.min_rate = rate if min_rate is None else min_rate
+
+    def throttle(self):
+        """Multiplicative decrease after a 429 (no-op unless min_rate < rate)."""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+
+    def recover(self):
+        """Additive increase back toward the configured rate after a successful call."""
+        if self.rate < self.base_rate:
+            with self.lock:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+    def acquire(self):
+        """Take one token, sleeping (outside the lock) until it is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.cap, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # Reserve the token even if it is not there yet; a negative balance
+            # queues concurrent callers behind each other
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
         if wait > 0:
             time.sleep(wait)
-        _last_call_at[(account_name, endpoint_key)] = time.time()
+
+
+_buckets = {}                      # key: (account_name, endpoint_key) -> TokenBucket
+_account_buckets = {}              # key: account_name -> adaptive TokenBucket shared by all endpoints
+_buckets_lock = threading.Lock()   # guards inserts only; each bucket has its own lock
+
+
+def _account_bucket(account_name: str) -> TokenBucket:
+    bucket = _account_buckets.get(account_name)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _account_buckets.setdefault(
+                account_name, TokenBucket(ACCOUNT_RATE_PER_SEC, ACCOUNT_RATE_BURST, ACCOUNT_RATE_MIN))
+    return bucket
+
+
+def _respect_rate_limit(account_name: str, endpoint_key: str):
+    key = (account_name, endpoint_key)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.setdefault(key, TokenBucket(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST))
+    _account_bucket(account_name).acquire()
+    bucket.acquire()
 
 
 def _with_429_backoff(req_fn, account_name: str, endpoint_key: str, max_attempts: int = 4):
     """
-    Execute req_fn() with per-account rate limiting and exponential backoff on HTTP 429.
+    Execute req_fn() with client-side pacing (per-account adaptive bucket + per-endpoint bucket)
+    and jittered exponential backoff on HTTP 429 as a safety net.
     req_fn must be a zero-arg callable that performs ONE SDK call (e.g., tl.get_all_orders).
     """
     delay = MIN_GAP_SEC
+    account_bucket = _account_bucket(account_name)
     for attempt in range(1, max_attempts + 1):
         _respect_rate_limit(account_name, endpoint_key)
         try:
-            return req_fn()
+            result = req_fn()
+            account_bucket.recover()
+            return result
         except Exception as e:
-            msg = str(e)
-            is_429 = ("429" in msg) or ("Too Many Requests" in msg)
+            # Prefer the HTTP status on the exception; only stringify it when there is none
+            resp = getattr(e, "response", None)
+            status = getattr(resp, "status_code", None)
+            if status is not None:
+                is_429 = status == 429
+            else:
+                msg = str(e)
+                is_429 = ("429" in msg) or ("Too Many Requests" in msg)
             if not is_429:
                 # Not a rate-limit error: bubble up
                 raise
-            # Use Retry-After if present; else exponential + small jitter
+            # Slow this account's pacing down so follow-up calls don't hit the limit too
+            account_bucket.throttle()
+            # Use Retry-After if present; else exponential, jittered to 0.5x-1.5x of the delay
             retry_after = None
             try:
-                resp = getattr(e, "response", None)
                 if resp is not None:
                     ra = resp.headers.get("Retry-After")
                     if ra is not None:
                         retry_after = float(ra)
             except Exception:
                 pass
-            sleep_s = retry_after if retry_after is not None else (delay + random.uniform(0.05, 0.25))
+            sleep_s = retry_after if retry_after is not None else delay * (0.5 + random.random())
             logger.warning(f"[{account_name}] 429 on {endpoint_key}; sleeping {sleep_s:.2f}s (attempt {attempt}/{max_attempts})")
             time.sleep(sleep_s)
             delay *= 1.6
     raise RuntimeError(f"[{account_name}] Too Many Requests on {endpoint_key} after {max_attempts} attempts")
 
 
+def _token_info(token: Optional[str]) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Returns (mask, exp_unix, seconds_left) for a token in one call.
+    The JWT decode is cached per token string (see _jwt_exp).
+    """
+    exp, left = _jwt_expiry_info(token)
+    return (_mask(token), exp, left)
+
+
 def _expired_jwt() -> str:
     """
     Makes a trivially expired JWT (alg=none style string) for testing client-side expiry logic.
@@ -120,15 +222,32 @@ def _expired_jwt() -> str:
     return f"{header}.{payload}."
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+def _invalidate_tokens(tl):
+    """Marks the TLAPI tokens as expired locally so the next get_access_token() re-authenticates."""
+    expired = _expired_jwt()
+    if hasattr(tl, "_auth_with_tokens"):
+        tl._auth_with_tokens(expired, expired)
+    else:
+        setattr(tl, "_access_token", expired)
+        setattr(tl, "_refresh_token", expired)
+
+
+# Configure logging: request threads only enqueue records; a background
+# QueueListener formats them and does the file/console I/O
+log_queue = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_file_handler = RotatingFileHandler('trading_bot.log', maxBytes=20_000_000, backupCount=5)
+_file_handler.setFormatter(_log_formatter)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_log_formatter)
+_queue_handler = QueueHandler(log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # final formatting happens in the listener
+
+# force=True: the tradelocker package configures the root logger on import
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler], force=True)
+_log_listener = QueueListener(log_queue, _file_handler, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # drains queued records on exit
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
@@ -141,21 +260,173 @@ PORT = int(os.getenv('PORT', 3000))
 ENVIRONMENT = os.getenv('ENVIRONMENT', 'https://demo.tradelocker.com')
 SERVER = os.getenv('SERVER', 'HEROFX')
 
+
+@dataclass(frozen=True, slots=True)
+class AccountCfg:
+    """One TradeLocker account from ACCOUNTS_JSON (missing environment/server fall back to the globals)"""
+    name: str = "Unknown"
+    environment: str = ENVIRONMENT
+    username: Optional[str] = None
+    password: Optional[str] = None
+    server: str = SERVER
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AccountCfg":
+        return cls(**{f: data[f] for f in cls.__dataclass_fields__ if f in data})
+
+
 # Account Configuration - will be loaded from Kubernetes Secrets
-ACCOUNTS = []
+ACCOUNTS: Tuple[AccountCfg, ...] = ()
+
+# SQLite tuning applied to every pooled connection (journal_mode=WAL is set in init_database)
+DB_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # ~20 MiB page cache
+)
+
+# Hot-path statements, kept as constants so each pooled connection's statement
+# cache reuses the compiled form instead of re-preparing them on every call
+SQL_INSERT_TRADE = '''
+    INSERT OR REPLACE INTO trades
+    (trade_id, account_name, symbol, side, lot_size, entry_price, sl_price,
+     order_id, status, metadata, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING', ?, CURRENT_TIMESTAMP)
+'''
+
+SQL_UPDATE_STATUS = '''
+    UPDATE trades
+    SET status = ?, metadata = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE trade_id = ? AND account_name = ?
+'''
+
+SQL_UPDATE_STATUS_WITH_POS = '''
+    UPDATE trades
+    SET status = ?, position_id = ?, metadata = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE trade_id = ? AND account_name = ?
+'''
+
+SQL_CLOSE_TRADE = '''
+    UPDATE trades
+    SET status = 'CLOSED',
+        close_timestamp = CURRENT_TIMESTAMP,
+        close_position_id = ?,
+        close_order_id = ?,
+        realized_pnl = ?,
+        close_method = ?,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE account_name = ? AND symbol = ? AND side = ? AND lot_size = ?
+      AND status IN ('PENDING', 'FILLED')
+      AND close_timestamp IS NULL
+    ORDER BY created_at DESC
+    LIMIT 1
+'''
+
+# /trades is read newest-first in keyset pages on (created_at, id) so no DB
+# connection or read transaction stays open while a slow client downloads
+TRADES_PAGE_SIZE = 500
+SQL_TRADES_FIRST_PAGE = '''
+    SELECT id, trade_id, account_name, symbol, side, lot_size, status, metadata, created_at
+    FROM trades
+    ORDER BY created_at DESC, id DESC
+    LIMIT ?
+'''
+
+SQL_TRADES_NEXT_PAGE = '''
+    SELECT id, trade_id, account_name, symbol, side, lot_size, status, metadata, created_at
+    FROM trades
+    WHERE (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC
+    LIMIT ?
+'''
+
+# Small pool of long-lived connections shared by all threads (see get_db_connection).
+# Flask serves each request on a fresh thread, so per-thread connections were reopened
+# on every request; pooled ones keep their prepared statements and page cache warm.
+DB_POOL_SIZE = 4
+DB_POOL_WAIT_SEC = 0.5  # how long to wait for a pooled connection before opening an overflow one
+_db_pool = queue.LifoQueue()
+_db_pool_slots = threading.BoundedSemaphore(DB_POOL_SIZE)
+
+# Shared keep-alive HTTP session for direct REST calls (retries are handled by the callers)
+_http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=0))
+_http_session.mount("https://", _http_adapter)
+_http_session.mount("http://", _http_adapter)
+
+# Signal description patterns, checked in this order by determine_signal_type
+_BUY_SIGNAL_RE = re.compile(r'buy signal', re.I)
+_SELL_SIGNAL_RE = re.compile(r'sell signal', re.I)
+_CLOSE_SIGNAL_RE = re.compile(r'close|exit signal', re.I)
+
+# Startup output, built once at import and emitted as a single write/log record
+STARTUP_HEADER = "\n".join([
+    "",
+    "=" * 70,
+    "🚀 STARTING FIXED COMPLETE TRADELOCKER TRADING BOT",
+    "=" * 70,
+])
+STARTUP_BANNER = "\n".join([
+    f"📡 Listening for Pine Script signals on port {PORT}...",
+    "🎯 Supported Signals:",
+    "   • BUY/SELL entry → LIMIT orders + database storage",
+    "   • CLOSE/EXIT → FIXED: Cancel orders (tl.delete_order) OR close positions (DELETE API)",
+    "",
+    "📊 Available Endpoints:",
+    "   POST /trade              - Handle Pine Script signals (entry & exit)",
+    "   GET  /trades             - View all trades in database",
+    "   GET  /trades/summary     - Trade counts by status",
+    "   GET  /trades/<trade_id>  - View specific trade",
+    "   GET  /test               - Test account connections",
+    "   GET  /                   - Health check",
+    "   GET  /debug/list         - List all active accounts",
+    "   GET  /debug/token/<account>  - Show token info",
+    "   POST /debug/invalidate/<account> - Force token refresh",
+    "   POST /debug/reauth/<account>   - Re-authenticate account",
+    "=" * 70,
+])
 
 # Per-account instrument cache
-instrument_cache = {}  # {account_name: DataFrame}
+instrument_cache = {}  # {account_name: {"name_to_ids": {name: [ids]}, "fetched_at": monotonic}}
+INSTRUMENTS_CACHE_TTL = 3600  # seconds; instruments rarely change intraday
+_instrument_cache_lock = threading.Lock()
+_instrument_refreshing = {}  # {account_name: threading.Event} for in-flight fetches
+
+# Per-account positions snapshot shared by the exit handler and _position_absent
+POSITIONS_CACHE_TTL = 0.5  # seconds
+_positions_cache = {}  # {account_name: (fetched_at_monotonic, DataFrame)}
+_positions_cache_lock = threading.Lock()
+
+# Per-account /test probe results (successful get_all_accounts calls only)
+PROBE_CACHE_TTL = 30  # seconds; health-check crons hit /test far more often than accounts change
+_probe_cache = {}  # {account_name: (fetched_at_monotonic, result_dict)}
+_probe_cache_lock = threading.Lock()
+
+# Upper bound on threads used to fan a signal out across accounts
+MAX_ACCOUNT_WORKERS = 16
 
 # Global variables
 tl_accounts = {}  # Store TradeLocker API instances
 active_accounts = []  # List of successfully connected accounts
 
 
+def _open_db_connection():
+    """Open a connection and apply the per-connection performance PRAGMAs"""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # Access columns by name
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
 def init_database():
     """Initialize SQLite database with trades table including exit fields"""
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with get_db_connection() as conn:
+            # WAL is persistent on the database file; set it once here
+            conn.execute("PRAGMA journal_mode=WAL")
+
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS trades (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -182,8 +453,13 @@ def init_database():
             ''')
 
             # Create indexes for faster queries
+            # (trade_id, created_at DESC) answers get_trade_by_id without a sort and
+            # supersedes the old single-column idx_trade_id
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_trades_tradeid_created ON trades(trade_id, created_at DESC)
+            ''')
             conn.execute('''
-                CREATE INDEX IF NOT EXISTS idx_trade_id ON trades(trade_id)
+                DROP INDEX IF EXISTS idx_trade_id
             ''')
             conn.execute('''
                 CREATE INDEX IF NOT EXISTS idx_account_status ON trades(account_name, status)
@@ -194,6 +470,19 @@ def init_database():
             conn.execute('''
                 CREATE INDEX IF NOT EXISTS idx_symbol_side_lot ON trades(symbol, side, lot_size, status)
             ''')
+            # Newest-first keyset pages for /trades
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_trades_created_id ON trades(created_at DESC, id DESC)
+            ''')
+            # Partial index over open trades only (used by SQL_CLOSE_TRADE via close_trades_bulk)
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_open_trades
+                ON trades(account_name, symbol, side, lot_size, created_at DESC)
+                WHERE status IN ('PENDING', 'FILLED') AND close_timestamp IS NULL
+            ''')
+
+            # Refresh planner statistics so the indexes above are actually used
+            conn.execute("ANALYZE trades")
 
             conn.commit()
             logger.info("✅ Database initialized successfully")
@@ -205,51 +494,85 @@ def init_database():
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row  # Access columns by name
+    """
+    Context manager borrowing a connection from the shared pool (at most DB_POOL_SIZE
+    pooled). Connections are kept open and returned to the pool on exit; an uncommitted
+    transaction is rolled back so the next borrower starts clean. If every pooled
+    connection stays busy for DB_POOL_WAIT_SEC, a temporary overflow connection is used
+    and closed afterwards, so callers never wait unbounded on the pool.
+    Under WAL, readers on different connections don't block.
+    """
+    pooled = _db_pool_slots.acquire(timeout=DB_POOL_WAIT_SEC)
+    conn = None
+    try:
+        if pooled:
+            try:
+                conn = _db_pool.get_nowait()
+            except queue.Empty:
+                pass
+        else:
+            logger.warning("⚠️ DB connection pool exhausted; using an overflow connection")
+        if conn is None:
+            conn = _open_db_connection()
+    except Exception:
+        if pooled:
+            _db_pool_slots.release()
+        raise
     try:
         yield conn
     finally:
-        conn.close()
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        finally:
+            if pooled:
+                _db_pool.put(conn)
+                _db_pool_slots.release()
+            else:
+                conn.close()
+
+
+def _dump_metadata(metadata) -> str:
+    """
+    Serialize trade metadata for the metadata column; empty metadata is stored as '{}'.
+    Decoded to str so SQLite stores TEXT (json_extract-friendly) rather than a BLOB.
+    """
+    if not metadata:
+        return '{}'
+    return orjson.dumps(metadata).decode()
 
 
-def save_trade_to_db(trade_id, account_name, symbol, side, lot_size, entry_price, sl_price=0, order_id=None, metadata=None):
-    """Save trade information to database"""
+def save_trades_bulk(rows):
+    """
+    Save several PENDING trades in a single transaction.
+    rows: iterable of (trade_id, account_name, symbol, side, lot_size, entry_price,
+                       sl_price, order_id, metadata_json) tuples
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
     try:
         with get_db_connection() as conn:
-            conn.execute('''
-                INSERT OR REPLACE INTO trades
-                (trade_id, account_name, symbol, side, lot_size, entry_price, sl_price,
-                 order_id, status, metadata, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING', ?, CURRENT_TIMESTAMP)
-            ''', (trade_id, account_name, symbol, side, lot_size, entry_price, sl_price,
-                  order_id, json.dumps(metadata) if metadata else None))
-
+            conn.execute("BEGIN")
+            conn.executemany(SQL_INSERT_TRADE, rows)
             conn.commit()
-            logger.info(f"💾 Saved trade {trade_id} to database for {account_name}")
+            logger.info(f"💾 Saved {len(rows)} trades to database in one transaction")
+            return len(rows)
 
     except Exception as e:
-        logger.error(f"❌ Error saving trade to database: {e}")
+        logger.error(f"❌ Error saving trades to database: {e}")
         raise
 
 
 def update_trade_status(trade_id, account_name, status, position_id=None, metadata=None):
     """Update trade status in database"""
     try:
+        meta_json = _dump_metadata(metadata)
         with get_db_connection() as conn:
             if position_id:
-                conn.execute('''
-                    UPDATE trades
-                    SET status = ?, position_id = ?, metadata = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE trade_id = ? AND account_name = ?
-                ''', (status, position_id, json.dumps(metadata) if metadata else None, trade_id, account_name))
+                conn.execute(SQL_UPDATE_STATUS_WITH_POS, (status, position_id, meta_json, trade_id, account_name))
             else:
-                conn.execute('''
-                    UPDATE trades
-                    SET status = ?, metadata = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE trade_id = ? AND account_name = ?
-                ''', (status, json.dumps(metadata) if metadata else None, trade_id, account_name))
+                conn.execute(SQL_UPDATE_STATUS, (status, meta_json, trade_id, account_name))
 
             conn.commit()
             logger.info(f"💾 Updated trade {trade_id} status to {status} for {account_name}")
@@ -258,36 +581,36 @@ def update_trade_status(trade_id, account_name, status, position_id=None, metada
         logger.error(f"❌ Error updating trade status: {e}")
 
 
-def close_trade_in_db(account_name, symbol, side, lot_size, close_method, position_id=None, order_id=None, realized_pnl=0):
-    """Update database when a trade is closed"""
+def close_trade_op(account_name, symbol, side, lot_size, close_method, position_id=None, order_id=None, realized_pnl=0):
+    """Build the SQL_CLOSE_TRADE parameters for one close (run them with close_trades_bulk)"""
+    return (position_id, order_id, realized_pnl, close_method, account_name, symbol, side, lot_size)
+
+
+def close_trades_bulk(ops):
+    """
+    Apply several close_trade_op() updates in a single transaction (one commit for the batch).
+    Returns the number of trades that were actually closed.
+    """
+    ops = list(ops)
+    if not ops:
+        return 0
+    closed = 0
     try:
         with get_db_connection() as conn:
-            cursor = conn.execute('''
-                UPDATE trades
-                SET status = 'CLOSED',
-                    close_timestamp = CURRENT_TIMESTAMP,
-                    close_position_id = ?,
-                    close_order_id = ?,
-                    realized_pnl = ?,
-                    close_method = ?,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE account_name = ? AND symbol = ? AND side = ? AND lot_size = ?
-                  AND status IN ('PENDING', 'FILLED')
-                  AND close_timestamp IS NULL
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (position_id, order_id, realized_pnl, close_method, account_name, symbol, side, lot_size))
-
-            if cursor.rowcount and cursor.rowcount > 0:
-                conn.commit()
-                logger.info(f"💾 Closed trade in database: {account_name} {symbol} {side} {lot_size}")
-                return True
-            else:
-                logger.warning(f"⚠️ No matching trade found to close: {account_name} {symbol} {side} {lot_size}")
-                return False
+            conn.execute("BEGIN")
+            for op in ops:
+                cursor = conn.execute(SQL_CLOSE_TRADE, op)
+                account_name, symbol, side, lot_size = op[4:]
+                if cursor.rowcount and cursor.rowcount > 0:
+                    closed += 1
+                    logger.info(f"💾 Closed trade in database: {account_name} {symbol} {side} {lot_size}")
+                else:
+                    logger.warning(f"⚠️ No matching trade found to close: {account_name} {symbol} {side} {lot_size}")
+            conn.commit()
+        return closed
     except Exception as e:
-        logger.error(f"❌ Error closing trade in database: {e}")
-        return False
+        logger.error(f"❌ Error closing trades in database: {e}")
+        return 0
 
 
 def load_accounts_from_env():
@@ -295,11 +618,11 @@ def load_accounts_from_env():
     global ACCOUNTS
     try:
         accounts_json = os.getenv('ACCOUNTS_JSON', '[]')
-        ACCOUNTS = json.loads(accounts_json)
+        ACCOUNTS = tuple(AccountCfg.from_dict(a) for a in orjson.loads(accounts_json))
         logger.info(f"✅ Loaded {len(ACCOUNTS)} accounts from environment")
     except Exception as e:
         logger.error(f"❌ Error loading accounts from environment: {e}")
-        ACCOUNTS = []
+        ACCOUNTS = ()
 
 
 def initialize_accounts():
@@ -310,16 +633,16 @@ def initialize_accounts():
     connection_results = {}
 
     for account_config in ACCOUNTS:
-        account_name = account_config.get("name", "Unknown")
+        account_name = account_config.name
         try:
             logger.info(f"Connecting to {account_name}...")
 
             # Initialize TradeLocker API
             tl_instance = TLAPI(
-                environment=account_config.get("environment", ENVIRONMENT),
-                username=account_config.get("username"),
-                password=account_config.get("password"),
-                server=account_config.get("server", SERVER)
+                environment=account_config.environment,
+                username=account_config.username,
+                password=account_config.password,
+                server=account_config.server
             )
             # tag client with its account name (for instrument_cache scoping)
             tl_instance.account_name = account_name
@@ -344,30 +667,24 @@ def initialize_accounts():
             connection_results[account_name] = f"❌ FAILED - {str(e)}"
             logger.error(f"❌ {account_name} initialization failed: {e}")
 
-    # Display connection summary
-    print("\n" + "="*60)
-    print("📊 ACCOUNT CONNECTION SUMMARY")
-    print("="*60)
+    # Connection summary as a single log record
+    summary_lines = ["", "=" * 60, "📊 ACCOUNT CONNECTION SUMMARY", "=" * 60]
     for account_config in ACCOUNTS:
-        account_name = account_config.get("name", "Unknown")
-        status = connection_results.get(account_name, "❌ FAILED")
-        server = account_config.get("server", SERVER)
-        print(f"{account_name:<20} ({server:<15}) - {status}")
-    print("="*60)
-    print(f"📈 RESULT: {len(active_accounts)}/{len(ACCOUNTS)} accounts connected")
-    print("")
+        status = connection_results.get(account_config.name, "❌ FAILED")
+        summary_lines.append(f"{account_config.name:<20} ({account_config.server:<15}) - {status}")
+    summary_lines += ["=" * 60, f"📈 RESULT: {len(active_accounts)}/{len(ACCOUNTS)} accounts connected", ""]
+    logger.info("\n".join(summary_lines))
 
     return len(active_accounts) > 0
 
 
 def determine_signal_type(description):
-    """Determine signal type from description"""
-    description = description.lower()
-    if "buy signal" in description or "🔵 buy signal" in description:
+    """Determine signal type from description (case-insensitive)"""
+    if _BUY_SIGNAL_RE.search(description):
         return "BUY"
-    elif "sell signal" in description or "🔴 sell signal" in description:
+    elif _SELL_SIGNAL_RE.search(description):
         return "SELL"
-    elif "close signal" in description or "exit signal" in description or "close" in description:
+    elif _CLOSE_SIGNAL_RE.search(description):
         return "CLOSE"
     else:
         return "UNKNOWN"
@@ -405,32 +722,75 @@ def validate_exit_parameters(symbol, side, lot_size):
     return errors
 
 
-def get_symbol_from_instrument_id(tl_instance, instrument_id):
+def _cache_instruments(account_name, instruments_df):
     """
-    Map instrument_id -> symbol using per-account instrument_cache only.
-    Caller is responsible for prefetching instruments into instrument_cache[account_name].
+    Store an account's name -> tradableInstrumentId index. The DataFrame itself is not
+    kept: exit matching only needs this dict, and the full frame is far larger.
+    """
+    name_to_ids = {}
+    for instrument_id, name in zip(instruments_df['tradableInstrumentId'].tolist(),
+                                   instruments_df['name'].tolist()):
+        name_to_ids.setdefault(name, []).append(instrument_id)
+    instrument_cache[account_name] = {
+        "name_to_ids": name_to_ids,
+        "fetched_at": time.monotonic()
+    }
+
+
+def _clear_sdk_instrument_caches(tl):
+    """
+    Forget the SDK's memoized instruments so the next get_all_instruments hits the API.
+    Without a disk_cache_location, TLAPI keeps get_all_instruments in a per-instance
+    lru_cache with no expiry, and get_instrument_id_from_symbol_name in a class-wide
+    lru_cache built on top of it; both are cleared so ids follow the fresh list.
+    """
+    sdk_cached = getattr(tl, "__cached_get_all_instruments", None)
+    if sdk_cached is not None and hasattr(sdk_cached, "cache_clear"):
+        sdk_cached.cache_clear()
+    symbol_lookup = getattr(type(tl), "get_instrument_id_from_symbol_name", None)
+    if hasattr(symbol_lookup, "cache_clear"):
+        symbol_lookup.cache_clear()
+
+
+def _get_instruments_cached(account_name, tl, ttl=INSTRUMENTS_CACHE_TTL):
     """
+    Return the account's instrument_cache entry, re-pulling get_all_instruments once it is
+    older than ttl seconds. Concurrent misses wait on a single in-flight fetch; if that
+    fetch fails they get whatever entry is cached (possibly stale, possibly None).
+    """
+    with _instrument_cache_lock:
+        cached = instrument_cache.get(account_name)
+        if cached is not None and time.monotonic() - cached["fetched_at"] < ttl:
+            return cached
+        refreshing = _instrument_refreshing.get(account_name)
+        if refreshing is None:
+            refreshing = _instrument_refreshing[account_name] = threading.Event()
+            is_fetcher = True
+        else:
+            is_fetcher = False
+
+    if not is_fetcher:
+        refreshing.wait()
+        return instrument_cache.get(account_name)
+
     try:
-        name = getattr(tl_instance, "account_name", None) or "default"
-        df = instrument_cache.get(name)
-        if df is None:
-            # Do NOT trigger a network call here; just report miss.
-            logger.debug(f"No instrument cache for {name}; returning None for id={instrument_id}")
-            return None
-        if isinstance(df, pd.DataFrame):
-            m = df[df['tradableInstrumentId'] == instrument_id]
-            if not m.empty:
-                return m.iloc[0]['name']
-        return None
-    except Exception as e:
-        logger.error(f"Error mapping instrument ID: {e}")
-        return None
+        if cached is not None:
+            # TTL refresh: make the SDK re-fetch instead of handing back its startup copy
+            _clear_sdk_instrument_caches(tl)
+        instruments_df = _with_429_backoff(lambda: tl.get_all_instruments(), account_name, "instruments")
+        _cache_instruments(account_name, instruments_df)
+        return instrument_cache[account_name]
+    finally:
+        with _instrument_cache_lock:
+            _instrument_refreshing.pop(account_name, None)
+        refreshing.set()
 
 
-def place_limit_order(tl_instance, symbol, side, lot_size, entry_price, sl_price=0):
-    """Place a LIMIT order via TradeLocker API"""
+def place_limit_order(tl_instance, symbol, side, lot_size, entry_price, sl_price=0, account_name=None):
+    """Place a LIMIT order via TradeLocker API (rate-limited, retried on 429)"""
     try:
-        # Get instrument ID from symbol
+        name = account_name or getattr(tl_instance, "account_name", "unknown")
+        # Get instrument ID from symbol (memoized per instance by the SDK's own lru_cache)
         instrument_id = tl_instance.get_instrument_id_from_symbol_name(symbol)
         if not instrument_id:
             raise Exception(f"Symbol {symbol} not found")
@@ -450,8 +810,9 @@ def place_limit_order(tl_instance, symbol, side, lot_size, entry_price, sl_price
             order_params["stop_loss"] = sl_price
             order_params["stop_loss_type"] = "absolute"
 
-        # Place the order
-        order_id = tl_instance.create_order(**order_params)
+        # Place the order; a 429 means it was rejected, so retrying it cannot duplicate it
+        order_id = _with_429_backoff(lambda: tl_instance.create_order(**order_params),
+                                     name, "create_order")
 
         if order_id:
             logger.info(f"📤 LIMIT order placed: ID {order_id}")
@@ -480,22 +841,57 @@ def cancel_pending_order(tl_instance, order_id, account_name=None):
         return False
 
 
+def _get_positions_cached(tl: TLAPI, ttl: float = POSITIONS_CACHE_TTL):
+    """
+    tl.get_all_positions(), reusing this account's snapshot if it is younger than ttl seconds.
+    Only a real fetch goes through the rate limiter, so cache hits never wait for a token.
+    """
+    name = getattr(tl, "account_name", None) or "default"
+    with _positions_cache_lock:
+        cached = _positions_cache.get(name)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    pos_df = _with_429_backoff(tl.get_all_positions, name, "positions")
+    with _positions_cache_lock:
+        _positions_cache[name] = (time.monotonic(), pos_df)
+    return pos_df
+
+
+def _invalidate_positions_cache(tl: TLAPI):
+    """Drop the account's positions snapshot (call after anything that changes positions)."""
+    name = getattr(tl, "account_name", None) or "default"
+    with _positions_cache_lock:
+        _positions_cache.pop(name, None)
+
+
 def _position_absent(tl: TLAPI, position_id: str) -> bool:
     """Return True if position is no longer present."""
     try:
-        pos_df = tl.get_all_positions()
+        pos_df = _get_positions_cached(tl)
         if pos_df is None or pos_df.empty:
             return True
-        return str(position_id) not in set(map(str, pos_df['id']))
+        ids = pos_df['id']
+        if ids.dtype.kind in 'iu':
+            # Compare in the column's native dtype instead of stringifying every row
+            try:
+                return not (ids == int(position_id)).any()
+            except (TypeError, ValueError):
+                return True
+        return not (ids.astype(str) == str(position_id)).any()
     except Exception:
         # If we can't fetch positions, don't claim it's absent
         return False
 
 
+# Status-code groups for close_filled_position_safe; any code not listed is retried with backoff
+_CLOSE_OK_CODES = frozenset({200, 204})
+_CLOSE_VERIFY_ABSENT_CODES = frozenset({404, 409})   # done if the position is already gone
+
+
 def close_filled_position_safe(tl: TLAPI, position_id: str, *, base_url: str = None, max_retries: int = 2, poll_seconds: float = 0.75) -> bool:
     """
     Robust close:
-      - Always fetch fresh token via tl.get_access_token()
+      - Token via tl.get_access_token() (the SDK caches it and refreshes it near expiry)
       - Use correct accNum header from tl.acc_num
       - Retry on 401/403 (auth), 409 (in-progress), 429/5xx (backoff)
       - 404 is OK if the position is actually gone
@@ -517,54 +913,36 @@ def close_filled_position_safe(tl: TLAPI, position_id: str, *, base_url: str = N
     backoff = 0.8
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.delete(url, headers=_headers(), timeout=30)
+            resp = _http_session.delete(url, headers=_headers(), timeout=30)
+            _invalidate_positions_cache(tl)  # positions may have changed server-side
             code = resp.status_code
 
-            if code in (200, 204):
+            if code in _CLOSE_OK_CODES:
                 return True
 
-            if code == 404:
+            if code in _CLOSE_VERIFY_ABSENT_CODES:
+                if code == 409:  # conflict/in-progress: give it a moment first
+                    time.sleep(poll_seconds)
                 if _position_absent(tl, position_id):
                     return True
-                # else retry below
+            # everything else (401/403 auth, 429/5xx, unexpected) just retries;
+            # each attempt re-reads the SDK's current token
+
+        except requests.RequestException:
+            pass
 
-            if code in (401, 403):  # auth/token issue
-                if attempt < max_retries:
-                    time.sleep(backoff)
-                    backoff *= 1.5
-                    continue
-                return False
+        # Shared backoff for every retryable outcome
+        if attempt < max_retries:
+            time.sleep(backoff)
+            backoff *= 1.5
+            continue
+        return False
 
-            if code == 409:  # conflict/in-progress
-                time.sleep(poll_seconds)
-                if _position_absent(tl, position_id):
-                    return True
-                if attempt < max_retries:
-                    time.sleep(backoff)
-                    backoff *= 1.5
-                    continue
-                return False
-
-            if code in (429, 500, 502, 503, 504):  # rate/server
-                if attempt < max_retries:
-                    time.sleep(backoff)
-                    backoff *= 1.5
-                    continue
-                return False
-
-            # Unexpected → one more try if available
-            if attempt < max_retries:
-                time.sleep(backoff)
-                backoff *= 1.5
-                continue
-            return False
 
-        except requests.RequestException:
-            if attempt < max_retries:
-                time.sleep(backoff)
-                backoff *= 1.5
-                continue
-            return False
+@app.before_request
+def _stamp_request():
+    """Format the response timestamp once per request (read back as g.request_ts)"""
+    g.request_ts = datetime.now().isoformat()
 
 
 @app.route('/', methods=['GET'])
@@ -574,21 +952,22 @@ def health():
         # Get active trade counts from database
         with get_db_connection() as conn:
             cursor = conn.execute('''
-                SELECT account_name, status, COUNT(*) as count
+                SELECT account_name,
+                       SUM(status = 'PENDING') AS pending,
+                       SUM(status = 'FILLED') AS filled,
+                       SUM(status = 'CLOSED') AS closed
                 FROM trades
-                GROUP BY account_name, status
+                GROUP BY account_name
             ''')
-            trade_stats = {}
-            for row in cursor.fetchall():
-                account = row['account_name']
-                if account not in trade_stats:
-                    trade_stats[account] = {}
-                trade_stats[account][row['status']] = row['count']
+            trade_stats = {
+                account: {"PENDING": pending, "FILLED": filled, "CLOSED": closed}
+                for account, pending, filled, closed in cursor.fetchall()
+            }
 
         return jsonify({
             "status": "🟢 TradeLocker Trading Bot - ACTIVE",
             "version": "2.1 - FIXED Entry & Exit Signals",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": g.request_ts,
             "active_accounts": len(active_accounts),
             "configured_accounts": len(ACCOUNTS),
             "account_names": active_accounts,
@@ -600,7 +979,7 @@ def health():
         return jsonify({
             "status": "🔴 Error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 500
 
 
@@ -609,7 +988,8 @@ def handle_trade_signal():
     """Main endpoint to handle Pine Script signals - both entry and exit"""
     try:
         data = request.json
-        logger.info(f"📥 Received signal: {json.dumps(data, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📥 Received signal: %s", json.dumps(data))
 
         if not active_accounts:
             return jsonify({"error": "No active accounts available"}), 500
@@ -651,6 +1031,47 @@ def handle_trade_signal():
         return jsonify({"error": str(e)}), 500
 
 
+def _process_account_entry(account_name, trade_id, symbol, side, lot_size, entry_price, sl_price,
+                           signal_type, description):
+    """
+    Place the LIMIT order for one account.
+    Returns (account_name, result_dict, db_row) where db_row is None on failure.
+    """
+    try:
+        logger.info(f"📤 Placing order on {account_name}...")
+        tl = tl_accounts[account_name]
+
+        # Place LIMIT order
+        order_id = place_limit_order(tl, symbol, side, lot_size, entry_price, sl_price,
+                                     account_name=account_name)
+
+        metadata = {
+            "signal_type": signal_type,
+            "description": description,
+            "entry_timestamp": datetime.now().isoformat()
+        }
+        db_row = (
+            trade_id, account_name, symbol, side, lot_size, entry_price, sl_price,
+            str(order_id), _dump_metadata(metadata)
+        )
+
+        logger.info(f"✅ {account_name}: Order placed successfully (ID: {order_id})")
+        return account_name, {
+            "status": "SUCCESS",
+            "order_id": order_id,
+            "trade_id": trade_id,
+            "message": "LIMIT order placed and saved to database"
+        }, db_row
+
+    except Exception as e:
+        logger.error(f"❌ {account_name}: Order failed - {e}")
+        return account_name, {
+            "status": "FAILED",
+            "error": str(e),
+            "trade_id": trade_id
+        }, None
+
+
 def handle_entry_signal(symbol, signal_type, fields, description):
     """Handle BUY/SELL entry signals - Place LIMIT orders on all accounts"""
     try:
@@ -673,67 +1094,46 @@ def handle_entry_signal(symbol, signal_type, fields, description):
         # Determine order side
         side = "buy" if signal_type == "BUY" else "sell"
 
-        logger.info("📊 Order Parameters:")
-        logger.info(f"   Trade ID: {trade_id}")
-        logger.info(f"   Symbol: {symbol}")
-        logger.info(f"   Side: {side.upper()}")
-        logger.info(f"   Lot Size: {lot_size}")
-        logger.info(f"   Entry Price: {entry_price}")
-        logger.info(f"   Stop Loss: {sl_price}")
+        logger.info("📊 Order: tid=%s sym=%s side=%s lot=%s entry=%s sl=%s",
+                    trade_id, symbol, side.upper(), lot_size, entry_price, sl_price)
 
-        # Execute on all active accounts
+        # Execute on all active accounts concurrently (per-account rate limiting still applies)
         account_results = {}
+        failed_accounts = {}
+        pending_rows = []  # DB rows for placed orders, written in one transaction below
         successful_count = 0
         failed_count = 0
 
-        for account_name in active_accounts:
-            try:
-                # Optional stagger to avoid API bursts (prevents 429)
-                time.sleep(0.1 + random.uniform(0.0, 0.15))
-
-                logger.info(f"📤 Placing order on {account_name}...")
-                tl = tl_accounts[account_name]
-
-                # Place LIMIT order
-                order_id = place_limit_order(tl, symbol, side, lot_size, entry_price, sl_price)
-
-                # Save to database
-                metadata = {
-                    "signal_type": signal_type,
-                    "description": description,
-                    "entry_timestamp": datetime.now().isoformat()
-                }
-
-                save_trade_to_db(
-                    trade_id=trade_id,
-                    account_name=account_name,
-                    symbol=symbol,
-                    side=side,
-                    lot_size=lot_size,
-                    entry_price=entry_price,
-                    sl_price=sl_price,
-                    order_id=str(order_id),
-                    metadata=metadata
-                )
+        with ThreadPoolExecutor(max_workers=min(MAX_ACCOUNT_WORKERS, len(active_accounts))) as executor:
+            futures = {
+                executor.submit(_process_account_entry, account_name, trade_id, symbol, side,
+                                lot_size, entry_price, sl_price, signal_type, description): account_name
+                for account_name in active_accounts
+            }
+            for future in as_completed(futures):
+                try:
+                    account_name, result, db_row = future.result()
+                except Exception as e:
+                    account_name, db_row = futures[future], None
+                    logger.error(f"❌ {account_name}: Order failed - {e}")
+                    result = {"status": "FAILED", "error": str(e), "trade_id": trade_id}
+                if db_row is not None:
+                    account_results[account_name] = result
+                    pending_rows.append(db_row)
+                    successful_count += 1
+                else:
+                    failed_accounts[account_name] = result
+                    failed_count += 1
+
+        # Save all placed orders at once (INSERT OR REPLACE keeps a retry idempotent)
+        try:
+            save_trades_bulk(pending_rows)
+        except Exception as db_err:
+            for result in account_results.values():
+                result["message"] = "LIMIT order placed but database save failed"
+                result["db_error"] = str(db_err)
 
-                account_results[account_name] = {
-                    "status": "SUCCESS",
-                    "order_id": order_id,
-                    "trade_id": trade_id,
-                    "message": "LIMIT order placed and saved to database"
-                }
-
-                successful_count += 1
-                logger.info(f"✅ {account_name}: Order placed successfully (ID: {order_id})")
-
-            except Exception as e:
-                account_results[account_name] = {
-                    "status": "FAILED",
-                    "error": str(e),
-                    "trade_id": trade_id
-                }
-                failed_count += 1
-                logger.error(f"❌ {account_name}: Order failed - {e}")
+        account_results.update(failed_accounts)
 
         # Summary
         logger.info(f"📊 ENTRY Summary: {successful_count} successful, {failed_count} failed")
@@ -754,7 +1154,7 @@ def handle_entry_signal(symbol, signal_type, fields, description):
                 "failed": failed_count
             },
             "account_results": account_results,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 200
 
     except ValueError as e:
@@ -765,6 +1165,149 @@ def handle_entry_signal(symbol, signal_type, fields, description):
         return jsonify({"error": str(e)}), 500
 
 
+def _first_match(df, symbol_ids, side, lot_size):
+    """
+    Return the first row of an orders/positions DataFrame whose instrument is one of
+    symbol_ids and whose side + lot size match, or None. The match mask is built on
+    the underlying numpy arrays, so no per-row Series or symbol lookup is needed.
+    symbol_ids comes from the cached name_to_ids map, which stands in for a merge
+    against the instruments DataFrame without building a joined frame per call.
+    """
+    if df is None or df.empty or not symbol_ids:
+        return None
+    mask = (
+        np.isin(df['tradableInstrumentId'].to_numpy(), symbol_ids) &
+        (df['side'].to_numpy() == side) &
+        (np.abs(df['qty'].to_numpy() - lot_size) < 0.001)  # float tolerance
+    )
+    idx = np.flatnonzero(mask)
+    return df.iloc[idx[0]] if idx.size else None
+
+
+def _no_position_result(symbol, side, lot_size):
+    """Per-account exit result when no matching order or position exists"""
+    return {
+        "status": "NO_POSITION_FOUND",
+        "message": f"No {symbol} {side.upper()} order or position with lot size {lot_size} found"
+    }
+
+
+def _try_cancel(tl, account_name, order, symbol, side, lot_size) -> Optional[Tuple[dict, Optional[tuple]]]:
+    """
+    Cancel the matched pending order.
+    Returns (SUCCESS result, close_trade_op for the DB), or None if there is no order or
+    the cancel failed (the caller then falls through to the position close).
+    """
+    if order is None:
+        return None
+    order_id = order['id']
+    oid = str(order_id)
+    logger.info("📋 Found matching pending order: %s", oid)
+    if not cancel_pending_order(tl, order_id):
+        logger.warning(f"⚠️ Order processing failed for {account_name}: Failed to cancel order {oid}")
+        return None
+
+    return {
+        "status": "SUCCESS",
+        "action": "ORDER_CANCELLED",
+        "message": f"{symbol} {side.upper()} {lot_size} - Order ID {oid} cancelled",
+        "order_id": oid
+    }, close_trade_op(account_name, symbol, side, lot_size, "ORDER_CANCELLED", order_id=oid)
+
+
+def _try_close(tl, account_name, position, symbol, side, lot_size) -> Optional[Tuple[dict, Optional[tuple]]]:
+    """
+    Close the matched position (token-safe).
+    Returns (SUCCESS result, close_trade_op for the DB) or (FAILED result, None),
+    or None if there is no position.
+    """
+    if position is None:
+        return None
+    pid = str(position['id'])
+    pos_unrealized_pnl = position.get('unrealizedPl', 0)
+    logger.info("📍 Found matching position: %s", pid)
+
+    # ✅ Token-safe close
+    if not close_filled_position_safe(tl, pid):
+        error = f"Failed to close position {pid}"
+        logger.error(f"❌ Position processing failed for {account_name}: {error}")
+        return {
+            "status": "FAILED",
+            "error": error
+        }, None
+
+    return {
+        "status": "SUCCESS",
+        "action": "POSITION_CLOSED",
+        "message": f"{symbol} {side.upper()} {lot_size} - Position ID {pid} closed",
+        "position_id": pid,
+        "realized_pnl": pos_unrealized_pnl
+    }, close_trade_op(account_name, symbol, side, lot_size, "POSITION_CLOSED",
+                      position_id=pid, realized_pnl=pos_unrealized_pnl)
+
+
+def _process_account_exit(account_name, symbol, side, lot_size):
+    """
+    Cancel the matching pending order, or close the matching position, on one account.
+    Returns (account_name, result_dict, db_op); result["status"] is SUCCESS, NO_POSITION_FOUND
+    or FAILED, and db_op is the close_trade_op to apply (None when nothing was closed).
+    """
+    try:
+        logger.info(f"🔍 Processing FIXED exit for {account_name}...")
+        tl = tl_accounts[account_name]
+
+        # --- Fetch once per account, orders and positions concurrently (rate-limited + 429 backoff) ---
+        orders = None
+        positions = None
+
+        with ThreadPoolExecutor(max_workers=2) as pull_executor:
+            orders_future = pull_executor.submit(
+                _with_429_backoff, lambda: tl.get_all_orders(), account_name, "orders")
+            positions_future = pull_executor.submit(_get_positions_cached, tl)
+
+            try:
+                orders = orders_future.result()
+            except Exception as order_pull_err:
+                logger.warning(f"⚠️ {account_name} orders pull failed: {order_pull_err}")
+
+            try:
+                positions = positions_future.result()
+            except Exception as pos_pull_err:
+                logger.warning(f"⚠️ {account_name} positions pull failed: {pos_pull_err}")
+
+        # Nothing open on this account at all: no need to touch instruments
+        if (orders is None or orders.empty) and (positions is None or positions.empty):
+            return account_name, _no_position_result(symbol, side, lot_size), None
+
+        # Instruments from the TTL cache (refreshed lazily; stale entry kept if the refresh fails)
+        try:
+            instruments = _get_instruments_cached(account_name, tl)
+        except Exception as inst_err:
+            logger.warning(f"⚠️ {account_name} instruments pull failed: {inst_err}")
+            instruments = instrument_cache.get(account_name)
+
+        # ---- Find the order/position matching symbol + side + lot size (vectorized) ----
+        # Resolve the signal's symbol to instrument ids once, instead of mapping every row to a symbol
+        symbol_ids = (instruments or {}).get("name_to_ids", {}).get(symbol, [])
+        order = _first_match(orders, symbol_ids, side, lot_size)
+        position = _first_match(positions, symbol_ids, side, lot_size)
+
+        # Cancel a pending order first; otherwise close the position; otherwise nothing matched
+        result, db_op = (
+            _try_cancel(tl, account_name, order, symbol, side, lot_size) or
+            _try_close(tl, account_name, position, symbol, side, lot_size) or
+            (_no_position_result(symbol, side, lot_size), None)
+        )
+        return account_name, result, db_op
+
+    except Exception as e:
+        logger.error(f"❌ {account_name}: Exit processing failed - {e}")
+        return account_name, {
+            "status": "FAILED",
+            "error": str(e)
+        }, None
+
+
 def handle_exit_signal(symbol, fields, description):
     """Handle CLOSE/EXIT signals - Cancel pending orders OR close filled positions (token-safe, 429-aware)."""
     try:
@@ -782,152 +1325,43 @@ def handle_exit_signal(symbol, fields, description):
                 "validation_errors": validation_errors
             }), 400
 
-        logger.info("📊 Exit Parameters:")
-        logger.info(f"   Symbol: {symbol}")
-        logger.info(f"   Side: {side.upper()}")
-        logger.info(f"   Lot Size: {lot_size}")
+        logger.info("📊 Exit: sym=%s side=%s lot=%s", symbol, side.upper(), lot_size)
 
-        # Execute on all active accounts
+        # Execute on all active accounts concurrently (per-account rate limiting still applies)
         account_results = {}
         successful_count = 0
         no_position_count = 0
         failed_count = 0
+        db_ops = []
 
-        for account_name in active_accounts:
-            try:
-                logger.info(f"🔍 Processing FIXED exit for {account_name}...")
-                tl = tl_accounts[account_name]
-
-                # --- Fetch once per account (rate-limited + 429 backoff) ---
-                orders = None
-                positions = None
-
-                try:
-                    orders = _with_429_backoff(lambda: tl.get_all_orders(), account_name, "orders")
-                except Exception as order_pull_err:
-                    logger.warning(f"⚠️ {account_name} orders pull failed: {order_pull_err}")
-
-                try:
-                    positions = _with_429_backoff(lambda: tl.get_all_positions(), account_name, "positions")
-                except Exception as pos_pull_err:
-                    logger.warning(f"⚠️ {account_name} positions pull failed: {pos_pull_err}")
-
-                # Prefetch instruments if cache missing for this account
-                if account_name not in instrument_cache or not isinstance(instrument_cache[account_name], pd.DataFrame):
-                    try:
-                        instruments_df = _with_429_backoff(lambda: tl.get_all_instruments(), account_name, "instruments")
-                        instrument_cache[account_name] = instruments_df
-                    except Exception as inst_err:
-                        logger.warning(f"⚠️ {account_name} instruments pull failed: {inst_err}")
-
-                # ---- Step 1: cancel pending orders if any ----
-                order_cancelled = False
+        with ThreadPoolExecutor(max_workers=min(MAX_ACCOUNT_WORKERS, len(active_accounts))) as executor:
+            futures = {
+                executor.submit(_process_account_exit, account_name, symbol, side, lot_size): account_name
+                for account_name in active_accounts
+            }
+            for future in as_completed(futures):
                 try:
-                    if orders is not None and not orders.empty:
-                        for _, order in orders.iterrows():
-                            order_instrument_id = order['tradableInstrumentId']
-                            order_symbol = get_symbol_from_instrument_id(tl, order_instrument_id)
-                            order_side = order['side']
-                            order_qty = order['qty']
-
-                            # Match: symbol + side + lot size
-                            if (
-                                order_symbol == symbol and
-                                order_side == side and
-                                abs(order_qty - lot_size) < 0.001  # float tolerance
-                            ):
-                                logger.info(f"📋 Found matching pending order: {order['id']}")
-                                if cancel_pending_order(tl, order['id']):
-                                    # Update DB
-                                    close_trade_in_db(
-                                        account_name, symbol, side, lot_size,
-                                        "ORDER_CANCELLED", order_id=str(order['id'])
-                                    )
-
-                                    account_results[account_name] = {
-                                        "status": "SUCCESS",
-                                        "action": "ORDER_CANCELLED",
-                                        "message": f"{symbol} {side.upper()} {lot_size} - Order ID {order['id']} cancelled",
-                                        "order_id": str(order['id'])
-                                    }
-                                    order_cancelled = True
-                                    successful_count += 1
-                                    break
-                                else:
-                                    raise Exception(f"Failed to cancel order {order['id']}")
-                except Exception as order_error:
-                    logger.warning(f"⚠️ Order processing failed for {account_name}: {order_error}")
-
-                # ---- Step 2: close position if nothing cancelled ----
-                if not order_cancelled:
-                    position_closed = False
-                    try:
-                        if positions is not None and not positions.empty:
-                            for _, position in positions.iterrows():
-                                pos_instrument_id = position['tradableInstrumentId']
-                                pos_symbol = get_symbol_from_instrument_id(tl, pos_instrument_id)
-                                pos_side = position['side']
-                                pos_qty = position['qty']
-                                pos_unrealized_pnl = position.get('unrealizedPl', 0)
-
-                                if (
-                                    pos_symbol == symbol and
-                                    pos_side == side and
-                                    abs(pos_qty - lot_size) < 0.001
-                                ):
-                                    logger.info(f"📍 Found matching position: {position['id']}")
-
-                                    # ✅ Token-safe close
-                                    if close_filled_position_safe(tl, str(position['id'])):
-                                        close_trade_in_db(
-                                            account_name, symbol, side, lot_size,
-                                            "POSITION_CLOSED", position_id=str(position['id']),
-                                            realized_pnl=pos_unrealized_pnl
-                                        )
-                                        account_results[account_name] = {
-                                            "status": "SUCCESS",
-                                            "action": "POSITION_CLOSED",
-                                            "message": f"{symbol} {side.upper()} {lot_size} - Position ID {position['id']} closed",
-                                            "position_id": str(position['id']),
-                                            "realized_pnl": pos_unrealized_pnl
-                                        }
-                                        position_closed = True
-                                        successful_count += 1
-                                        break
-                                    else:
-                                        raise Exception(f"Failed to close position {position['id']}")
-
-                        if not position_closed:
-                            account_results[account_name] = {
-                                "status": "NO_POSITION_FOUND",
-                                "message": f"No {symbol} {side.upper()} position with lot size {lot_size} found"
-                            }
-                            no_position_count += 1
-                    except Exception as position_error:
-                        logger.error(f"❌ Position processing failed for {account_name}: {position_error}")
-                        failed_count += 1
-
-                # If nothing happened and no result set, record as not found
-                if not order_cancelled and account_name not in account_results:
-                    account_results[account_name] = {
-                        "status": "NO_POSITION_FOUND",
-                        "message": f"No {symbol} {side.upper()} order or position with lot size {lot_size} found"
-                    }
+                    account_name, result, db_op = future.result()
+                except Exception as e:
+                    account_name = futures[future]
+                    logger.error(f"❌ {account_name}: Exit processing failed - {e}")
+                    result, db_op = {"status": "FAILED", "error": str(e)}, None
+                account_results[account_name] = result
+                if db_op is not None:
+                    db_ops.append(db_op)
+                if result["status"] == "SUCCESS":
+                    successful_count += 1
+                elif result["status"] == "NO_POSITION_FOUND":
                     no_position_count += 1
+                else:
+                    failed_count += 1
 
-            except Exception as e:
-                account_results[account_name] = {
-                    "status": "FAILED",
-                    "error": str(e)
-                }
-                failed_count += 1
-                logger.error(f"❌ {account_name}: Exit processing failed - {e}")
+        # Record every account's close in one transaction
+        close_trades_bulk(db_ops)
 
         # Summary
-        logger.info(
-            f"📊 FIXED EXIT Summary: {successful_count} successful, "
-            f"{no_position_count} no position, {failed_count} failed"
-        )
+        logger.info("📊 FIXED EXIT Summary: %d successful, %d no position, %d failed",
+                    successful_count, no_position_count, failed_count)
 
         return jsonify({
             "status": "COMPLETED",
@@ -942,7 +1376,7 @@ def handle_exit_signal(symbol, fields, description):
                 "failed": failed_count
             },
             "account_results": account_results,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 200
 
     except ValueError as e:
@@ -953,43 +1387,109 @@ def handle_exit_signal(symbol, fields, description):
         return jsonify({"error": str(e)}), 500
 
 
+def _jsonify(obj, status=200):
+    """jsonify() replacement that serializes with orjson (bytes straight into the response body)"""
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype='application/json'
+    )
+
+
+def _parse_metadata(trade, _json_loads=orjson.loads):
+    """Decode a trade dict's metadata JSON in place (left as-is if it is not valid JSON)"""
+    if trade['metadata']:
+        try:
+            trade['metadata'] = _json_loads(trade['metadata'])
+        except ValueError:
+            pass
+    return trade
+
+
 @app.route('/trades', methods=['GET'])
 def get_all_trades():
-    """Get all trades from database"""
+    """
+    Get all trades from database. The body is streamed: the status summary comes from a
+    GROUP BY up front, then rows are read in keyset pages of TRADES_PAGE_SIZE and each row
+    is serialized with orjson, so neither the trade list nor the full JSON document is
+    built in memory. The DB connection is only held while a page is being read, never
+    while the client downloads.
+    """
+    def _read_page(after):
+        with get_db_connection() as conn:
+            if after is None:
+                cursor = conn.execute(SQL_TRADES_FIRST_PAGE, (TRADES_PAGE_SIZE,))
+            else:
+                cursor = conn.execute(SQL_TRADES_NEXT_PAGE, (*after, TRADES_PAGE_SIZE))
+            return cursor.fetchall()
+
+    def _generate(rows):
+        prefix = b''
+        while rows:
+            for row in rows:
+                trade = dict(row)
+                del trade['id']
+                yield prefix + orjson.dumps(_parse_metadata(trade))
+                prefix = b','
+            if len(rows) < TRADES_PAGE_SIZE:
+                break
+            last = rows[-1]
+            rows = _read_page((last['created_at'], last['id']))
+        yield b']}'
+
     try:
         with get_db_connection() as conn:
             cursor = conn.execute('''
-                SELECT * FROM trades
-                ORDER BY created_at DESC
+                SELECT status, COUNT(*) FROM trades
+                GROUP BY status
             ''')
+            status_summary = dict(cursor.fetchall())
+        # Read the first page here so DB errors still get a 500 before streaming starts
+        first_page = _read_page(None)
+    except Exception as e:
+        logger.error(f"❌ Error fetching trades: {e}")
+        return _jsonify({"error": str(e)}, 500)
 
-            trades = [dict(row) for row in cursor.fetchall()]
+    head = orjson.dumps({
+        "status": "SUCCESS",
+        "total_trades": sum(status_summary.values()),
+        "status_summary": status_summary,
+        "timestamp": g.request_ts
+    })[:-1] + b',"trades":['
 
-            # Parse metadata JSON
-            for trade in trades:
-                if trade['metadata']:
-                    try:
-                        trade['metadata'] = json.loads(trade['metadata'])
-                    except:
-                        pass
+    def _stream():
+        yield head
+        try:
+            yield from _generate(first_page)
+        except Exception as e:
+            # Status and headers are already sent; the client sees a truncated body
+            logger.error(f"❌ Error streaming trades: {e}")
+            raise
 
-            # Group by status for summary
-            status_summary = {}
-            for trade in trades:
-                status = trade['status']
-                status_summary[status] = status_summary.get(status, 0) + 1
+    return Response(stream_with_context(_stream()), mimetype='application/json')
 
-        return jsonify({
+
+@app.route('/trades/summary', methods=['GET'])
+def get_trades_summary():
+    """Get trade counts by status (aggregated in SQLite, no rows pulled into Python)"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.execute('''
+                SELECT status, COUNT(*) FROM trades
+                GROUP BY status
+            ''')
+            status_summary = dict(cursor.fetchall())
+
+        return _jsonify({
             "status": "SUCCESS",
-            "total_trades": len(trades),
+            "total_trades": sum(status_summary.values()),
             "status_summary": status_summary,
-            "trades": trades,
-            "timestamp": datetime.now().isoformat()
-        }), 200
+            "timestamp": g.request_ts
+        })
 
     except Exception as e:
-        logger.error(f"❌ Error fetching trades: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error(f"❌ Error fetching trade summary: {e}")
+        return _jsonify({"error": str(e)}, 500)
 
 
 @app.route('/trades/<trade_id>', methods=['GET'])
@@ -1002,60 +1502,74 @@ def get_trade_by_id(trade_id):
                 ORDER BY created_at DESC
             ''', (trade_id,))
 
-            trades = [dict(row) for row in cursor.fetchall()]
-
-            # Parse metadata
-            for trade in trades:
-                if trade['metadata']:
-                    try:
-                        trade['metadata'] = json.loads(trade['metadata'])
-                    except:
-                        pass
+            trades = [_parse_metadata(dict(row)) for row in cursor.fetchall()]
 
         if not trades:
-            return jsonify({
+            return _jsonify({
                 "status": "NOT_FOUND",
                 "message": f"No trades found for trade_id: {trade_id}"
-            }), 404
+            }, 404)
 
-        return jsonify({
+        return _jsonify({
             "status": "SUCCESS",
             "trade_id": trade_id,
             "trades_found": len(trades),
             "trades": trades,
-            "timestamp": datetime.now().isoformat()
-        }), 200
+            "timestamp": g.request_ts
+        })
 
     except Exception as e:
         logger.error(f"❌ Error fetching trade by ID: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _jsonify({"error": str(e)}, 500)
+
+
+def _probe(account_name, ttl: float = PROBE_CACHE_TTL):
+    """
+    Connection-test one account, reusing a successful result younger than ttl seconds.
+    The probe is get_account_state: get_all_accounts is memoized by the SDK, so it never
+    reaches the API and can't tell whether the connection still works.
+    """
+    with _probe_cache_lock:
+        cached = _probe_cache.get(account_name)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    try:
+        tl = tl_accounts[account_name]
+        _with_429_backoff(lambda: tl.get_account_state(), account_name, "account_state")
+        accounts = tl.get_all_accounts()  # served from the SDK's cache
+    except Exception as e:
+        # Failures are not cached so a recovered account shows up on the next probe
+        return {
+            "status": "❌ FAILED",
+            "error": str(e)
+        }
+    result = {
+        "status": "✅ CONNECTED",
+        "account_info": str(accounts) if accounts is not None else "No data"
+    }
+    with _probe_cache_lock:
+        _probe_cache[account_name] = (time.monotonic(), result)
+    return result
 
 
 @app.route('/test', methods=['GET'])
 def test_connections():
-    """Test TradeLocker connections for all accounts"""
+    """Test TradeLocker connections for all accounts (probed concurrently)"""
     try:
         test_results = {}
 
-        for account_name in active_accounts:
-            try:
-                tl = tl_accounts[account_name]
-                accounts = tl.get_all_accounts()
-                test_results[account_name] = {
-                    "status": "✅ CONNECTED",
-                    "account_info": str(accounts) if accounts is not None else "No data"
-                }
-            except Exception as e:
-                test_results[account_name] = {
-                    "status": "❌ FAILED",
-                    "error": str(e)
-                }
+        if active_accounts:
+            with ThreadPoolExecutor(max_workers=min(len(active_accounts), MAX_ACCOUNT_WORKERS)) as executor:
+                futures = {executor.submit(_probe, account_name): account_name
+                           for account_name in active_accounts}
+                for future in as_completed(futures):
+                    test_results[futures[future]] = future.result()
 
         return jsonify({
             "status": "Connection Test Results",
             "active_accounts": len(active_accounts),
             "test_results": test_results,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 200
 
     except Exception as e:
@@ -1069,18 +1583,17 @@ def debug_list_accounts():
     for name in active_accounts:
         tl = tl_accounts[name]
         try:
-            tok = tl.get_access_token()
-            exp, left = _jwt_expiry_info(tok)
+            mask, exp, left = _token_info(tl.get_access_token())
             results[name] = {
                 "environment": getattr(tl, "environment", None),
                 "accNum": str(getattr(tl, "acc_num", "")),
-                "access_token_mask": _mask(tok),
+                "access_token_mask": mask,
                 "exp_unix": exp,
                 "seconds_left": left
             }
         except Exception as e:
             results[name] = {"error": str(e)}
-    return jsonify({"accounts": results, "timestamp": datetime.now().isoformat()}), 200
+    return jsonify({"accounts": results, "timestamp": g.request_ts}), 200
 
 
 @app.route('/debug/token/<account_name>', methods=['GET'])
@@ -1090,16 +1603,15 @@ def debug_show_token(account_name):
         return jsonify({"error": f"Unknown account '{account_name}'"}), 404
     try:
         tl = tl_accounts[account_name]
-        tok = tl.get_access_token()
-        exp, left = _jwt_expiry_info(tok)
+        mask, exp, left = _token_info(tl.get_access_token())
         return jsonify({
             "account": account_name,
             "environment": getattr(tl, "environment", None),
             "accNum": str(getattr(tl, "acc_num", "")),
-            "access_token_mask": _mask(tok),
+            "access_token_mask": mask,
             "exp_unix": exp,
             "seconds_left": left,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1112,21 +1624,15 @@ def debug_invalidate_tokens(account_name):
         return jsonify({"error": f"Unknown account '{account_name}'"}), 404
     tl = tl_accounts[account_name]
     try:
-        expired = _expired_jwt()
-        if hasattr(tl, "_auth_with_tokens"):
-            tl._auth_with_tokens(expired, expired)
-        else:
-            setattr(tl, "_access_token", expired)
-            setattr(tl, "_refresh_token", expired)
-        tok = tl.get_access_token()
-        exp, left = _jwt_expiry_info(tok)
+        _invalidate_tokens(tl)
+        mask, exp, left = _token_info(tl.get_access_token())
         return jsonify({
             "account": account_name,
             "message": "Tokens invalidated & refreshed.",
-            "new_access_token_mask": _mask(tok),
+            "new_access_token_mask": mask,
             "exp_unix": exp,
             "seconds_left": left,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1134,34 +1640,39 @@ def debug_invalidate_tokens(account_name):
 
 @app.route('/debug/reauth/<account_name>', methods=['POST'])
 def debug_force_reauth(account_name):
-    """Triggers a fresh access token retrieval."""
+    """Triggers a fresh access token retrieval (invalidates the current tokens first)."""
     if account_name not in tl_accounts:
         return jsonify({"error": f"Unknown account '{account_name}'"}), 404
     tl = tl_accounts[account_name]
     try:
         before = tl.get_access_token()
-        b_mask = _mask(before)
-        b_exp, b_left = _jwt_expiry_info(before)
+        b_mask, b_exp, b_left = _token_info(before)
 
+        # Without invalidating, the second call would just return the same token
+        _invalidate_tokens(tl)
         after = tl.get_access_token()
-        a_mask = _mask(after)
-        a_exp, a_left = _jwt_expiry_info(after)
+        a_mask, a_exp, a_left = _token_info(after)
 
         return jsonify({
             "account": account_name,
             "before": {"mask": b_mask, "exp_unix": b_exp, "seconds_left": b_left},
             "after":  {"mask": a_mask, "exp_unix": a_exp, "seconds_left": a_left},
             "token_changed": before != after,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": g.request_ts
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _handle_sigterm(signum, frame):
+    """Exit cleanly on SIGTERM (k8s pod shutdown) so atexit flushes the log queue"""
+    sys.exit(0)
+
+
 if __name__ == '__main__':
-    print("\n" + "="*70)
-    print("🚀 STARTING FIXED COMPLETE TRADELOCKER TRADING BOT")
-    print("="*70)
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+    logger.info(STARTUP_HEADER)
 
     # Initialize database
     try:
@@ -1175,22 +1686,7 @@ if __name__ == '__main__':
 
     # Initialize accounts
     if initialize_accounts():
-        logger.info(f"✅ Bot initialized with {len(active_accounts)} active accounts")
-        logger.info("📡 Listening for Pine Script signals on port 3000...")
-        logger.info("🎯 Supported Signals:")
-        logger.info("   • BUY/SELL entry → LIMIT orders + database storage")
-        logger.info("   • CLOSE/EXIT → FIXED: Cancel orders (tl.delete_order) OR close positions (DELETE API)")
-        logger.info("\n📊 Available Endpoints:")
-        logger.info("   POST /trade              - Handle Pine Script signals (entry & exit)")
-        logger.info("   GET  /trades             - View all trades in database")
-        logger.info("   GET  /trades/<trade_id>  - View specific trade")
-        logger.info("   GET  /test               - Test account connections")
-        logger.info("   GET  /                   - Health check")
-        logger.info("   GET  /debug/list         - List all active accounts")
-        logger.info("   GET  /debug/token/<account>  - Show token info")
-        logger.info("   POST /debug/invalidate/<account> - Force token refresh")
-        logger.info("   POST /debug/reauth/<account>   - Re-authenticate account")
-        print("="*70)
+        logger.info("✅ Bot initialized with %d active accounts\n%s", len(active_accounts), STARTUP_BANNER)
 
         # Start Flask server
         app.run(host='0.0.0.0', port=PORT, debug=False)